@@ -0,0 +1,78 @@
+"""
+データベーススキーマの作成・更新
+
+アプリの起動とは別に、デプロイ時に一度実行する:
+    python -m app.database.migrate
+
+既存のテーブルに追加できるのは、NULLを許可し、デフォルト値・インデックス・制約を持たない列のみ。
+それ以外の変更は自動では行わず、手動で移行する必要がある。
+"""
+from sqlalchemy import Column, inspect, text
+from sqlalchemy.engine import Engine
+from typing import List, Optional
+from app.database.database import Base, engine
+
+def _unsupported_reason(column: Column) -> Optional[str]:
+    """
+    ADD COLUMN だけでは正しく追加できない列であれば、その理由を返す
+    """
+    if column.primary_key:
+        return "primary key"
+    if not column.nullable:
+        return "NOT NULL"
+    if column.default is not None or column.server_default is not None:
+        return "default value"
+    if column.foreign_keys:
+        return "foreign key"
+    if column.index or column.unique:
+        return "index"
+    return None
+
+def migrate(bind: Engine = engine) -> List[str]:
+    """
+    テーブルを作成し、既存のテーブルに不足している列を追加する
+
+    追加できない列が1つでもある場合は、何も変更せずに RuntimeError を送出する。
+
+    Returns:
+        list: 追加した列（"テーブル名.列名"）
+    """
+    # モデルを登録するために読み込む
+    from app.models import models  # noqa: F401
+
+    Base.metadata.create_all(bind=bind)
+
+    missing = []
+    unsupported = []
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            reason = _unsupported_reason(column)
+            if reason:
+                unsupported.append(f"{table.name}.{column.name} ({reason})")
+            else:
+                missing.append(column)
+
+    if unsupported:
+        raise RuntimeError(
+            "Cannot add these columns automatically; migrate them manually: " + ", ".join(unsupported)
+        )
+
+    added = []
+    preparer = bind.dialect.identifier_preparer
+    with bind.begin() as connection:
+        for column in missing:
+            column_type = column.type.compile(dialect=bind.dialect)
+            connection.execute(text(
+                f"ALTER TABLE {preparer.format_table(column.table)} ADD COLUMN {preparer.format_column(column)} {column_type}"
+            ))
+            added.append(f"{column.table.name}.{column.name}")
+    return added
+
+if __name__ == "__main__":
+    for column in migrate():
+        print(f"Added column: {column}")
+    print("Database schema is up to date")
@@ -1,18 +1,42 @@
+import os
+import logging
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-from app.database.database import engine
-from app.models import models
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from app.routers import problems, submissions
+from app.services.code_evaluator import get_code_evaluator
+from app.services.llm_provider import get_llm_provider
+from app.services.metrics import REGISTRY
 
-# データベーステーブルの作成
-models.Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+# データベーステーブルの作成は起動時ではなく `python -m app.database.migrate` で行う
+
+def _preload_services():
+    """
+    評価サービスとLLMプロバイダーを事前に生成
+    """
+    for factory in (get_llm_provider, get_code_evaluator):
+        try:
+            factory()
+        except Exception:
+            logger.warning("Failed to preload %s", factory.__name__, exc_info=True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 起動を待たせないよう、事前生成はバックグラウンドで行う
+    if os.getenv("PRELOAD_SERVICES", "false").lower() in ("1", "true", "yes"):
+        threading.Thread(target=_preload_services, daemon=True).start()
+    yield
 
 app = FastAPI(
     title="Python課題アドバイス生成システム",
     description="GCI講座用のPython課題自動アドバイス生成API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 静的ファイルとテンプレートの設定
@@ -44,6 +68,13 @@ async def health_check():
     """
     return {"status": "healthy", "message": "Python課題アドバイス生成システム"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus形式のメトリクス
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
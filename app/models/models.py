@@ -28,6 +28,7 @@ class Submission(Base):
     test_results = Column(Text)  # JSON文字列として保存
     advice = Column(Text)
     cost = Column(Integer, default=0)  # LLM使用料（token数など）
+    stage_timings = Column(Text)  # ステージ別処理時間（JSON文字列として保存）
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     problem = relationship("Problem", back_populates="submissions")
\ No newline at end of file
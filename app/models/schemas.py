@@ -34,6 +34,7 @@ class Submission(SubmissionBase):
     test_results: Optional[str] = None
     advice: Optional[str] = None
     cost: int = 0
+    stage_timings: Optional[str] = None
     created_at: datetime
     
     class Config:
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List
+import os
 from app.database.database import get_db
 from app.models import models, schemas
+from app.services.cache import ResponseCache, cached_response
 
 router = APIRouter(prefix="/problems", tags=["problems"])
 
+# 問題データはほとんど変更されないため、取得結果をキャッシュする
+problem_cache = ResponseCache(
+    maxsize=int(os.getenv("PROBLEM_CACHE_SIZE", 256)),
+    ttl=float(os.getenv("PROBLEM_CACHE_TTL", 60))
+)
+
 @router.post("/", response_model=schemas.Problem)
 def create_problem(problem: schemas.ProblemCreate, db: Session = Depends(get_db)):
     """
@@ -15,25 +23,33 @@ def create_problem(problem: schemas.ProblemCreate, db: Session = Depends(get_db)
     db.add(db_problem)
     db.commit()
     db.refresh(db_problem)
+    problem_cache.clear()
     return db_problem
 
 @router.get("/", response_model=List[schemas.Problem])
-def get_problems(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_problems(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """
     問題一覧を取得
     """
-    problems = db.query(models.Problem).offset(skip).limit(limit).all()
-    return problems
+    def load():
+        problems = db.query(models.Problem).offset(skip).limit(limit).all()
+        # 削除は更新日時に現れないため、一覧には Last-Modified を付けず ETag のみで検証する
+        return [schemas.Problem.model_validate(p).model_dump(mode="json") for p in problems], None
+
+    return cached_response(request, problem_cache.get_or_load(("problems", skip, limit), load))
 
 @router.get("/{problem_id}", response_model=schemas.Problem)
-def get_problem(problem_id: int, db: Session = Depends(get_db)):
+def get_problem(request: Request, problem_id: int, db: Session = Depends(get_db)):
     """
     特定の問題を取得
     """
-    problem = db.query(models.Problem).filter(models.Problem.id == problem_id).first()
-    if problem is None:
-        raise HTTPException(status_code=404, detail="Problem not found")
-    return problem
+    def load():
+        problem = db.query(models.Problem).filter(models.Problem.id == problem_id).first()
+        if problem is None:
+            raise HTTPException(status_code=404, detail="Problem not found")
+        return schemas.Problem.model_validate(problem).model_dump(mode="json"), problem.updated_at or problem.created_at
+
+    return cached_response(request, problem_cache.get_or_load(("problem", problem_id), load))
 
 @router.put("/{problem_id}", response_model=schemas.Problem)
 def update_problem(problem_id: int, problem: schemas.ProblemCreate, db: Session = Depends(get_db)):
@@ -49,6 +65,7 @@ def update_problem(problem_id: int, problem: schemas.ProblemCreate, db: Session
     
     db.commit()
     db.refresh(db_problem)
+    problem_cache.clear()
     return db_problem
 
 @router.delete("/{problem_id}")
@@ -62,4 +79,5 @@ def delete_problem(problem_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_problem)
     db.commit()
+    problem_cache.clear()
     return {"message": "Problem deleted successfully"}
\ No newline at end of file
@@ -1,14 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
 from sqlalchemy.orm import Session
 from typing import List
 import json
+import logging
+import os
 from app.database.database import get_db
 from app.models import models, schemas
-from app.services.code_evaluator import CodeEvaluator
-from app.services.gemini_service import GeminiAdviceService
+from app.services.cache import ResponseCache, cached_response
+from app.services.code_evaluator import get_code_evaluator
+from app.services.llm_provider import get_llm_provider, CHEATING_CONFIDENCE_THRESHOLD
+from app.services.metrics import Trace, start_trace, span, SUBMISSION_OUTCOMES
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/submissions", tags=["submissions"])
 
+# 評価が終わった提出とアドバイスは変更されないため、結果をキャッシュする
+submission_cache = ResponseCache(maxsize=int(os.getenv("SUBMISSION_CACHE_SIZE", 1024)))
+
 @router.post("/", response_model=schemas.Submission)
 def create_submission(
     submission: schemas.SubmissionCreate, 
@@ -35,20 +44,32 @@ def create_submission(
     return db_submission
 
 @router.get("/{submission_id}", response_model=schemas.Submission)
-def get_submission(submission_id: int, db: Session = Depends(get_db)):
+def get_submission(request: Request, submission_id: int, db: Session = Depends(get_db)):
     """
     提出を取得
     """
-    submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
-    if submission is None:
-        raise HTTPException(status_code=404, detail="Submission not found")
-    return submission
+    key = ("submission", submission_id)
+    entry = submission_cache.get(key)
+    if entry is None:
+        submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
+        if submission is None:
+            raise HTTPException(status_code=404, detail="Submission not found")
+        if submission.status == "pending":
+            return submission
+        # 提出は評価完了時に変わるため created_at は最終更新日時にならない。ETag のみで検証する
+        entry = submission_cache.set(key, schemas.Submission.model_validate(submission).model_dump(mode="json"))
+    return cached_response(request, entry)
 
 @router.get("/{submission_id}/advice", response_model=schemas.AdviceResponse)
-def get_advice(submission_id: int, db: Session = Depends(get_db)):
+def get_advice(request: Request, submission_id: int, db: Session = Depends(get_db)):
     """
     アドバイスを取得
     """
+    key = ("advice", submission_id)
+    entry = submission_cache.get(key)
+    if entry is not None:
+        return cached_response(request, entry)
+
     submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
     if submission is None:
         raise HTTPException(status_code=404, detail="Submission not found")
@@ -60,7 +81,7 @@ def get_advice(submission_id: int, db: Session = Depends(get_db)):
         test_results = json.loads(submission.test_results) if submission.test_results else {}
         advice_data = json.loads(submission.advice) if submission.advice else {}
         
-        return schemas.AdviceResponse(
+        advice = schemas.AdviceResponse(
             advice=advice_data.get("advice", "アドバイスがありません"),
             test_results=test_results,
             cost=submission.cost,
@@ -69,6 +90,9 @@ def get_advice(submission_id: int, db: Session = Depends(get_db)):
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Failed to parse advice data")
 
+    entry = submission_cache.set(key, advice.model_dump(mode="json"))
+    return cached_response(request, entry)
+
 @router.get("/", response_model=List[schemas.Submission])
 def get_submissions(
     skip: int = 0, 
@@ -90,20 +114,31 @@ def evaluate_submission(submission_id: int, db: Session):
     """
     バックグラウンドタスクとして実行される評価処理
     """
+    with start_trace() as trace:
+        _evaluate_submission(submission_id, db, trace)
+
+def _evaluate_submission(submission_id: int, db: Session, trace: Trace):
+    submission = None
     try:
         # 提出との問題を取得
-        submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
-        problem = db.query(models.Problem).filter(models.Problem.id == submission.problem_id).first()
+        with span("load"):
+            submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
+            problem = None
+            if submission:
+                problem = db.query(models.Problem).filter(models.Problem.id == submission.problem_id).first()
         
         if not submission or not problem:
+            SUBMISSION_OUTCOMES.inc(outcome="not_found")
             return
         
-        # コード評価サービスの初期化
-        evaluator = CodeEvaluator()
-        gemini_service = GeminiAdviceService()
+        # コード評価サービスの取得（プロセス内で一度だけ生成される）
+        with span("setup"):
+            evaluator = get_code_evaluator()
+            llm_provider = get_llm_provider()
         
         # 安全性チェック
-        is_safe, safety_warnings = evaluator.check_code_safety(submission.code)
+        with span("safety_check"):
+            is_safe, safety_warnings = evaluator.check_code_safety(submission.code)
         if not is_safe:
             submission.status = "error"
             submission.advice = json.dumps({
@@ -111,24 +146,30 @@ def evaluate_submission(submission_id: int, db: Session):
                 "suggestions": safety_warnings,
                 "hints": []
             })
-            db.commit()
+            # 保存する処理時間はコミット前までのもの（コミットの時間はヒストグラムにのみ記録される）
+            submission.stage_timings = json.dumps(trace.to_dict())
+            with span("commit"):
+                db.commit()
+            SUBMISSION_OUTCOMES.inc(outcome="unsafe")
             return
         
-        # コード評価の実行
+        # コード評価の実行（テストケースごとの時間は評価サービス内で記録）
         test_results, all_passed = evaluator.evaluate_code(submission.code, problem.test_cases)
         
         # チート検出
-        cheat_result = gemini_service.detect_cheating(submission.code, problem.description)
+        with span("cheat_detection"):
+            cheat_result = llm_provider.detect_cheating(submission.code, problem.description)
         
         # アドバイス生成
-        advice_data = gemini_service.generate_advice(
-            submission.code, 
-            problem.description, 
-            test_results
-        )
+        with span("advice"):
+            advice_data = llm_provider.generate_advice(
+                submission.code, 
+                problem.description, 
+                test_results
+            )
         
         # チート検出結果をアドバイスに追加
-        if cheat_result.get("is_cheating", False) and cheat_result.get("confidence", 0) > 0.7:
+        if cheat_result.get("is_cheating", False) and cheat_result.get("confidence", 0) > CHEATING_CONFIDENCE_THRESHOLD:
             advice_data["advice"] = "提出されたコードには不適切な内容が含まれている可能性があります。問題を理解し、自分で解法を考えてみましょう。"
             advice_data["suggestions"] = cheat_result.get("recommendations", [])
         
@@ -137,15 +178,26 @@ def evaluate_submission(submission_id: int, db: Session):
         submission.test_results = json.dumps(test_results)
         submission.advice = json.dumps(advice_data)
         submission.cost = advice_data.get("token_count", 0)
+        # 保存する処理時間はコミット前までのもの（コミットの時間はヒストグラムにのみ記録される）
+        # 評価後の提出はキャッシュされるため、コミット後に処理時間だけを更新することはしない
+        submission.stage_timings = json.dumps(trace.to_dict())
         
-        db.commit()
+        with span("commit"):
+            db.commit()
+        SUBMISSION_OUTCOMES.inc(outcome="evaluated")
         
     except Exception as e:
-        # エラーハンドリング
+        # エラーハンドリング（エラーの種類はステージごとに span で集計済み）
+        logger.exception("Failed to evaluate submission %s", submission_id)
+        SUBMISSION_OUTCOMES.inc(outcome="error")
+        db.rollback()
+        if submission is None:
+            return
         submission.status = "error"
         submission.advice = json.dumps({
             "advice": f"評価中にエラーが発生しました: {str(e)}",
             "suggestions": [],
             "hints": []
         })
-        db.commit()
\ No newline at end of file
+        submission.stage_timings = json.dumps(trace.to_dict())
+        db.commit()
@@ -0,0 +1,116 @@
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Hashable, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response
+
+class CacheEntry:
+    """
+    JSONにシリアライズ済みのレスポンス本文と検証用のヘッダー情報
+    """
+
+    def __init__(self, body: Any, last_modified: Optional[datetime] = None):
+        self.content = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = f'"{hashlib.sha1(self.content).hexdigest()}"'
+        self.last_modified = _as_utc(last_modified) if last_modified else None
+        self.created = time.monotonic()
+
+class ResponseCache:
+    """
+    プロセス内のLRUキャッシュ
+
+    ttl を指定した場合は、その秒数を過ぎたエントリを破棄する。
+    複数のワーカープロセスで動かす場合、無効化は各プロセス内にしか反映されないため、
+    ttl で古いデータが残る時間を制限する。
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.monotonic() - entry.created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Tuple[Any, Optional[datetime]]]) -> CacheEntry:
+        """
+        キャッシュにあればそれを返し、なければ loader で (本文, 最終更新日時) を取得して保存する
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            generation = self._generation
+        entry = CacheEntry(*loader())
+        self._store(key, entry, generation)
+        return entry
+
+    def set(self, key: Hashable, body: Any, last_modified: Optional[datetime] = None) -> CacheEntry:
+        entry = CacheEntry(body, last_modified)
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key: Hashable, entry: CacheEntry, generation: Optional[int] = None):
+        with self._lock:
+            # 読み込み中に無効化された場合は、古い可能性があるため保存しない
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLiteの CURRENT_TIMESTAMP はタイムゾーンなしのUTCで返される
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+def _is_not_modified(request: Request, entry: CacheEntry) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match がある場合は If-Modified-Since を無視する（RFC 9110）
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == entry.etag for tag in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or entry.last_modified is None:
+        return False
+    try:
+        since = _as_utc(parsedate_to_datetime(if_modified_since))
+    except (TypeError, ValueError):
+        return False
+    return entry.last_modified <= since
+
+def cached_response(request: Request, entry: CacheEntry, cache_control: str = "no-cache") -> Response:
+    """
+    キャッシュのエントリからレスポンスを作成（条件付きリクエストには304を返す）
+    """
+    headers = {"ETag": entry.etag, "Cache-Control": cache_control}
+    if entry.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(entry.last_modified, usegmt=True)
+
+    if _is_not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.content, media_type="application/json", headers=headers)
@@ -1,14 +1,18 @@
 import json
-import docker
 import tempfile
 import os
+import threading
 from typing import Dict, Any, List, Tuple
 from dotenv import load_dotenv
+from app.services.metrics import span, TEST_CASE_RESULTS, EVALUATION_ERRORS
 
 load_dotenv()
 
 class CodeEvaluator:
     def __init__(self):
+        # Docker SDKは読み込みが重いため、評価サービスを初めて使うときに読み込む
+        import docker
+
         self.client = docker.from_env()
         self.timeout = int(os.getenv("SANDBOX_TIMEOUT", 30))
     
@@ -35,7 +39,9 @@ class CodeEvaluator:
             all_passed = True
             
             for i, test_case in enumerate(test_data):
-                result = self._run_test_case(code, test_case, i)
+                with span("test_case", case_num=i):
+                    result = self._run_test_case(code, test_case, i)
+                TEST_CASE_RESULTS.inc(status=result["status"])
                 results["details"].append(result)
                 
                 if result["status"] == "passed":
@@ -48,6 +54,7 @@ class CodeEvaluator:
             return results, all_passed
             
         except Exception as e:
+            EVALUATION_ERRORS.inc(stage="evaluate_code", error_type=type(e).__name__)
             return {
                 "passed": 0,
                 "total": 0,
@@ -73,6 +80,7 @@ class CodeEvaluator:
                 return result
                 
         except Exception as e:
+            EVALUATION_ERRORS.inc(stage="test_case", error_type=type(e).__name__)
             return {
                 "case_num": case_num,
                 "status": "error",
@@ -134,6 +142,8 @@ except Exception as e:
         """
         Dockerコンテナ内でコードを実行
         """
+        from docker.errors import ContainerError
+
         try:
             container = self.client.containers.run(
                 "python:3.9-slim",
@@ -150,7 +160,8 @@ except Exception as e:
                     result = json.loads(container)
                     result["case_num"] = case_num
                     return result
-                except json.JSONDecodeError:
+                except json.JSONDecodeError as e:
+                    EVALUATION_ERRORS.inc(stage="sandbox", error_type=type(e).__name__)
                     return {
                         "case_num": case_num,
                         "status": "error",
@@ -165,13 +176,15 @@ except Exception as e:
                     "stderr": container
                 }
                 
-        except docker.errors.ContainerError as e:
+        except ContainerError as e:
+            EVALUATION_ERRORS.inc(stage="sandbox", error_type=type(e).__name__)
             return {
                 "case_num": case_num,
                 "status": "error",
                 "error": f"コンテナエラー: {str(e)}"
             }
         except Exception as e:
+            EVALUATION_ERRORS.inc(stage="sandbox", error_type=type(e).__name__)
             return {
                 "case_num": case_num,
                 "status": "error",
@@ -206,4 +219,18 @@ except Exception as e:
                 warnings.append(f"危険な可能性のあるコード: {pattern}")
                 is_safe = False
         
-        return is_safe, warnings
\ No newline at end of file
+        return is_safe, warnings
+
+_evaluator = None
+_evaluator_lock = threading.Lock()
+
+def get_code_evaluator() -> CodeEvaluator:
+    """
+    プロセス内で共有する評価サービスを取得（初回呼び出し時に生成）
+    """
+    global _evaluator
+    if _evaluator is None:
+        with _evaluator_lock:
+            if _evaluator is None:
+                _evaluator = CodeEvaluator()
+    return _evaluator
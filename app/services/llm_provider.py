@@ -0,0 +1,360 @@
+import os
+import json
+import logging
+import threading
+import time
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+from app.services.metrics import LLM_ERRORS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# チート検出の信頼度がこの値を超えた場合にアドバイスを置き換える
+CHEATING_CONFIDENCE_THRESHOLD = 0.7
+
+class LLMProvider:
+    """
+    アドバイス生成・チート検出を行うLLMプロバイダーの基底クラス
+
+    リモートのLLMを使うプロバイダーは _generate_text を実装する。
+    プロンプトを使わないプロバイダーは _generate_advice / _detect_cheating を上書きする。
+    """
+
+    name = "base"
+
+    def generate_advice(self, code: str, problem_description: str, test_results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        コードと問題、テスト結果を基にアドバイスを生成
+
+        Args:
+            code: 提出されたコード
+            problem_description: 問題の説明
+            test_results: テスト実行結果
+
+        Returns:
+            dict: アドバイスと関連情報
+        """
+        try:
+            return self._generate_advice(code, problem_description, test_results)
+        except Exception as e:
+            LLM_ERRORS.inc(provider=self.name, operation="advice", error_type=type(e).__name__)
+            return {
+                "advice": f"アドバイス生成エラー: {str(e)}",
+                "suggestions": [],
+                "hints": [],
+                "token_count": 0,
+                "cost_estimate": 0
+            }
+
+    def detect_cheating(self, code: str, problem_description: str) -> Dict[str, Any]:
+        """
+        チート行為の検出
+        """
+        try:
+            return self._detect_cheating(code, problem_description)
+        except Exception as e:
+            LLM_ERRORS.inc(provider=self.name, operation="cheating", error_type=type(e).__name__)
+            return {
+                "is_cheating": False,
+                "confidence": 0.0,
+                "reasons": [f"チート検出エラー: {str(e)}"],
+                "recommendations": []
+            }
+
+    def _generate_advice(self, code: str, problem_description: str, test_results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        アドバイス生成の本体（例外はそのまま送出する）
+        """
+        prompt = self._create_advice_prompt(code, problem_description, test_results)
+        response_text = self._generate_text(prompt)
+
+        # レスポンスの解析
+        advice_data = self._parse_advice_response(response_text)
+
+        # トークン使用量の計算（概算）
+        token_count = self._estimate_token_count(prompt + response_text)
+
+        return {
+            "advice": advice_data.get("advice", "アドバイスの生成に失敗しました"),
+            "suggestions": advice_data.get("suggestions", []),
+            "hints": advice_data.get("hints", []),
+            "token_count": token_count,
+            "cost_estimate": self._calculate_cost(token_count)
+        }
+
+    def _detect_cheating(self, code: str, problem_description: str) -> Dict[str, Any]:
+        """
+        チート検出の本体（例外はそのまま送出する）
+        """
+        prompt = self._create_cheating_prompt(code, problem_description)
+        response_text = self._generate_text(prompt)
+        return self._parse_advice_response(response_text)
+
+    def _generate_text(self, prompt: str) -> str:
+        """
+        プロンプトに対する応答テキストを取得
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support prompt generation")
+
+    def _create_advice_prompt(self, code: str, problem_description: str, test_results: Dict[str, Any]) -> str:
+        """
+        アドバイス生成用のプロンプトを作成
+        """
+        failed_tests = [test for test in test_results.get("details", []) if test.get("status") != "passed"]
+
+        prompt = f"""
+あなたはプログラミング学習のメンターです。初学者向けのPython課題に対して、建設的なアドバイスを提供してください。
+
+**重要な指針:**
+1. 答えを直接教えるのではなく、自分で修正を考えられるようなヒントを提供する
+2. 具体的で実行可能なアドバイスを心がける
+3. 受講生の学習レベルに合わせた説明をする
+4. エラーの原因を特定し、改善の方向性を示す
+
+**問題の説明:**
+{problem_description}
+
+**提出されたコード:**
+```python
+{code}
+```
+
+**テスト結果:**
+- 成功: {test_results.get('passed', 0)}/{test_results.get('total', 0)}
+- エラー: {test_results.get('errors', [])}
+
+**失敗したテストケース:**
+{json.dumps(failed_tests, ensure_ascii=False, indent=2)}
+
+以下のJSON形式で回答してください:
+{{
+    "advice": "メインのアドバイス（200字程度）",
+    "suggestions": [
+        "具体的な改善提案1",
+        "具体的な改善提案2",
+        "具体的な改善提案3"
+    ],
+    "hints": [
+        "実装のヒント1",
+        "実装のヒント2"
+    ]
+}}
+
+**チート防止について:**
+コードに答えが含まれている場合でも、学習に繋がるような指導をしてください。
+"""
+        return prompt
+
+    def _create_cheating_prompt(self, code: str, problem_description: str) -> str:
+        """
+        チート検出用のプロンプトを作成
+        """
+        prompt = f"""
+以下のPythonコードを分析し、チート行為の可能性があるかを判定してください。
+
+**問題の説明:**
+{problem_description}
+
+**提出されたコード:**
+```python
+{code}
+```
+
+**チェック項目:**
+1. コード内に答えが直接書かれているか
+2. 問題を解かずに期待される出力を直接返しているか
+3. 外部からの答えのコピーの可能性があるか
+
+以下のJSON形式で回答してください:
+{{
+    "is_cheating": true/false,
+    "confidence": 0.0-1.0,
+    "reasons": ["理由1", "理由2"],
+    "recommendations": ["推奨事項1", "推奨事項2"]
+}}
+"""
+        return prompt
+
+    def _parse_advice_response(self, response_text: str) -> Dict[str, Any]:
+        """
+        LLMからのレスポンスを解析
+        """
+        try:
+            # JSONブロックを抽出
+            start_marker = "```json"
+            end_marker = "```"
+
+            if start_marker in response_text:
+                start = response_text.find(start_marker) + len(start_marker)
+                end = response_text.find(end_marker, start)
+                json_text = response_text[start:end].strip()
+            else:
+                # JSONブロックがない場合は、{}で囲まれた部分を探す
+                start = response_text.find("{")
+                end = response_text.rfind("}") + 1
+                if start >= 0 and end > start:
+                    json_text = response_text[start:end]
+                else:
+                    # JSONが見つからない場合はデフォルト値を返す
+                    return {
+                        "advice": response_text[:500] + "..." if len(response_text) > 500 else response_text,
+                        "suggestions": [],
+                        "hints": []
+                    }
+
+            return json.loads(json_text)
+
+        except json.JSONDecodeError:
+            # JSON解析に失敗した場合は、プレーンテキストとして処理
+            return {
+                "advice": response_text[:500] + "..." if len(response_text) > 500 else response_text,
+                "suggestions": [],
+                "hints": []
+            }
+
+    def _estimate_token_count(self, text: str) -> int:
+        """
+        トークン数の概算（日本語対応）
+        """
+        # 簡易的な計算: 文字数 ÷ 2 （日本語の場合）
+        return len(text) // 2
+
+    def _calculate_cost(self, token_count: int) -> float:
+        """
+        コストの概算計算
+        """
+        # Gemini Proの料金（2024年時点の概算）
+        # 入力: $0.00025 / 1K tokens
+        # 出力: $0.0005 / 1K tokens
+        # 簡易計算として平均を使用
+        cost_per_1k_tokens = 0.000375
+        return (token_count / 1000) * cost_per_1k_tokens
+
+class FallbackLLMProvider(LLMProvider):
+    """
+    主プロバイダーが失敗・タイムアウトした場合に代替プロバイダーへ切り替えるプロバイダー
+
+    タイムアウトは主プロバイダー側のリクエストに設定する。
+    連続して failure_threshold 回失敗すると cooldown 秒間は主プロバイダーを呼ばずに代替プロバイダーを使い、
+    その後は1件だけ主プロバイダーを試して復旧を確認する（サーキットブレーカー）。
+    """
+
+    def __init__(self, primary: LLMProvider, fallback: LLMProvider, failure_threshold: int = 3, cooldown: float = 60.0):
+        self.primary = primary
+        self.fallback = fallback
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.name = f"{primary.name}+{fallback.name}"
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _generate_advice(self, code: str, problem_description: str, test_results: Dict[str, Any]) -> Dict[str, Any]:
+        if self._allow_primary():
+            try:
+                result = self.primary._generate_advice(code, problem_description, test_results)
+                self._record_success()
+                return result
+            except Exception as e:
+                LLM_ERRORS.inc(provider=self.primary.name, operation="advice", error_type=type(e).__name__)
+                self._record_failure()
+        return self.fallback._generate_advice(code, problem_description, test_results)
+
+    def _detect_cheating(self, code: str, problem_description: str) -> Dict[str, Any]:
+        if self._allow_primary():
+            try:
+                result = self.primary._detect_cheating(code, problem_description)
+                self._record_success()
+                return result
+            except Exception as e:
+                LLM_ERRORS.inc(provider=self.primary.name, operation="cheating", error_type=type(e).__name__)
+                self._record_failure()
+        return self.fallback._detect_cheating(code, problem_description)
+
+    def _allow_primary(self) -> bool:
+        """
+        主プロバイダーを呼び出してよいか（サーキットが開いている間は False）
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            # 待機時間が過ぎたら1件だけ試す（結果が出るまで他の呼び出しは代替プロバイダーを使う）
+            self._opened_at = time.monotonic()
+            return True
+
+    def _record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("%s failed %d times in a row; using %s for %gs",
+                                   self.primary.name, self._failures, self.fallback.name, self.cooldown)
+                self._opened_at = time.monotonic()
+
+def create_llm_provider(provider_name: Optional[str] = None) -> LLMProvider:
+    """
+    環境変数 LLM_PROVIDER に応じてLLMプロバイダーを生成
+
+    - gemini: Gemini API（利用できない場合や失敗・タイムアウト時はローカルプロバイダーにフォールバック）
+    - local: ルールベースの決定的なローカルプロバイダー
+    - replay: 記録済みの応答のみを返すプロバイダー
+    - record: Gemini APIの応答を記録しながら返すプロバイダー（Geminiが利用できない場合はエラー、失敗時もフォールバックしない）
+    """
+    from app.services.local_advice_service import LocalAdviceService
+    from app.services.replay_service import ReplayAdviceService
+
+    provider_name = (provider_name or os.getenv("LLM_PROVIDER", "gemini")).lower()
+    replay_dir = os.getenv("LLM_REPLAY_DIR", "./llm_replay")
+    timeout = float(os.getenv("LLM_TIMEOUT", 30))
+    failure_threshold = int(os.getenv("LLM_CIRCUIT_FAILURES", 3))
+    cooldown = float(os.getenv("LLM_CIRCUIT_COOLDOWN", 60))
+    fallback_enabled = os.getenv("LLM_FALLBACK", "true").lower() in ("1", "true", "yes")
+
+    if provider_name == "local":
+        return LocalAdviceService()
+    if provider_name == "replay":
+        return ReplayAdviceService(replay_dir)
+    if provider_name not in ("gemini", "record"):
+        raise ValueError(f"Unknown LLM_PROVIDER: {provider_name}")
+
+    try:
+        from app.services.gemini_service import GeminiAdviceService
+        provider: LLMProvider = GeminiAdviceService(timeout=timeout)
+    except (ValueError, ImportError):
+        # 記録モードではGeminiの応答を記録できないと意味がないため、設定の誤りとして扱う
+        if provider_name == "record" or not fallback_enabled:
+            raise
+        # APIキーやSDKがない場合はローカルプロバイダーで動作させる
+        logger.warning("Gemini provider is unavailable; falling back to the local provider", exc_info=True)
+        return LocalAdviceService()
+
+    if provider_name == "record":
+        # ローカルの応答で代替すると記録が欠けたことに気付けないため、失敗はそのまま返す
+        return ReplayAdviceService(replay_dir, recorder=provider)
+
+    if fallback_enabled:
+        provider = FallbackLLMProvider(provider, LocalAdviceService(), failure_threshold, cooldown)
+    return provider
+
+_provider: Optional[LLMProvider] = None
+_provider_lock = threading.Lock()
+
+def get_llm_provider() -> LLMProvider:
+    """
+    プロセス内で共有するLLMプロバイダーを取得（初回呼び出し時に生成）
+    """
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = create_llm_provider()
+    return _provider
@@ -0,0 +1,184 @@
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.extend(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(str(value))}"' for name, value in pairs) + "}"
+
+class Counter:
+    """
+    単調増加するカウンター
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    """
+    値の分布を累積バケットで集計するヒストグラム
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._values[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    labels = _format_labels(self.labelnames, key, {"le": repr(bound)})
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key, {"le": "+Inf"})
+                lines.append(f"{self.name}_bucket{labels} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+class MetricsRegistry:
+    """
+    メトリクスを登録し、Prometheusのテキスト形式で出力する
+    """
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+SUBMISSION_OUTCOMES = REGISTRY.counter(
+    "submission_evaluations_total", "Number of finished submission evaluations by outcome", ("outcome",)
+)
+EVALUATION_ERRORS = REGISTRY.counter(
+    "submission_evaluation_errors_total", "Errors raised or handled during submission evaluation by stage and type", ("stage", "error_type")
+)
+TEST_CASE_RESULTS = REGISTRY.counter(
+    "submission_test_case_results_total", "Number of executed test cases by status", ("status",)
+)
+LLM_ERRORS = REGISTRY.counter(
+    "llm_errors_total", "Errors returned by LLM providers by provider, operation and type", ("provider", "operation", "error_type")
+)
+STAGE_DURATION = REGISTRY.histogram(
+    "submission_stage_duration_seconds", "Duration of each submission evaluation stage", ("stage",)
+)
+EVALUATION_DURATION = REGISTRY.histogram(
+    "submission_evaluation_duration_seconds", "Total duration of a submission evaluation"
+)
+
+class Trace:
+    """
+    1件の提出評価におけるステージ別の処理時間
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        呼び出し時点までの処理時間（total は開始からこの呼び出しまで）
+        """
+        return {
+            "total": round(time.perf_counter() - self.started, 6),
+            "stages": self.spans
+        }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+@contextmanager
+def start_trace():
+    """
+    評価処理のトレースを開始し、処理中の span を記録する
+    """
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        EVALUATION_DURATION.observe(time.perf_counter() - trace.started)
+
+@contextmanager
+def span(stage: str, **attributes: Any):
+    """
+    ステージの処理時間を計測してヒストグラムと現在のトレースに記録する
+
+    例外が発生した場合はステージと例外の型ごとにエラーを数え、そのまま送出する。
+    """
+    started = time.perf_counter()
+    error_type = None
+    try:
+        yield
+    except Exception as e:
+        error_type = type(e).__name__
+        EVALUATION_ERRORS.inc(stage=stage, error_type=error_type)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        STAGE_DURATION.observe(duration, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            record = {"stage": stage, **attributes, "duration": round(duration, 6)}
+            if error_type:
+                record["error"] = error_type
+            trace.spans.append(record)
@@ -0,0 +1,56 @@
+import os
+import json
+import hashlib
+import tempfile
+from typing import Optional
+from app.services.llm_provider import LLMProvider
+
+class ReplayAdviceService(LLMProvider):
+    """
+    プロンプトのハッシュをキーとして保存済みの応答を返すプロバイダー
+
+    recorder を指定すると、保存されていないプロンプトは recorder に問い合わせ、
+    その応答を保存してから返す（記録モード）。
+    """
+
+    name = "replay"
+
+    def __init__(self, replay_dir: str, recorder: Optional[LLMProvider] = None):
+        self.replay_dir = replay_dir
+        self.recorder = recorder
+        if recorder is not None:
+            self.name = f"record({recorder.name})"
+        os.makedirs(replay_dir, exist_ok=True)
+
+    def _generate_text(self, prompt: str) -> str:
+        path = self._response_path(prompt)
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["response"]
+
+        if self.recorder is None:
+            raise KeyError(f"No recorded response for prompt hash {self.prompt_hash(prompt)}")
+
+        response_text = self.recorder._generate_text(prompt)
+        self._save(path, prompt, response_text)
+        return response_text
+
+    @staticmethod
+    def prompt_hash(prompt: str) -> str:
+        """
+        プロンプトのハッシュ値を計算
+        """
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def _response_path(self, prompt: str) -> str:
+        return os.path.join(self.replay_dir, f"{self.prompt_hash(prompt)}.json")
+
+    def _save(self, path: str, prompt: str, response_text: str):
+        """
+        応答を保存（書き込み途中のファイルが読まれないよう一時ファイル経由で置き換える）
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.replay_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"prompt": prompt, "response": response_text}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
@@ -0,0 +1,460 @@
+"""
+提出パイプラインのエンドツーエンド負荷試験
+
+スタブのサンドボックスとローカルLLMプロバイダーでアプリを起動し、
+POST /api/submissions/ から評価完了までのレイテンシ・ステージ別時間・スループット・エラー率を計測する。
+レイテンシは予定到着時刻から計測するため、クライアント側で送信が遅れた時間も含まれる。
+
+使い方:
+    python benchmarks/bench_pipeline.py --rate 5 --count 100 --output bench.json
+    python benchmarks/bench_pipeline.py --baseline bench.json --max-regression 0.2
+"""
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 提出の種類・出現比率・評価後の期待される状態
+# 期待と異なる状態で終わった提出はエラーとして数える（評価処理が例外で終わった場合など）
+SUBMISSION_MIX = [
+    ("correct", 0.55, "evaluated", "def main(a, b):\n    return a + b\n"),
+    ("wrong_answer", 0.20, "evaluated", "def main(a, b):\n    return a - b\n"),
+    ("runtime_error", 0.10, "evaluated", "def main(a, b):\n    return a + c\n"),
+    ("unsafe", 0.10, "error", "import os\n\ndef main(a, b):\n    return a + b\n"),
+    ("cheating", 0.05, "evaluated", "def main(a, b):\n    return 3\n"),
+]
+
+BENCH_PROBLEM = {
+    "title": "2つの数の和",
+    "description": "2つの整数 a, b を受け取り、その和を返す関数 main を実装してください。",
+    "test_cases": json.dumps([
+        {"input": [1, 2], "expected": 3},
+        {"input": [5, 10], "expected": 15},
+        {"input": [0, 0], "expected": 0},
+    ]),
+    "expected_output": "a + b",
+    "difficulty": "beginner",
+}
+
+STAGES = ["safety_check", "sandbox", "llm", "db_write"]
+
+# 実際の送信レートがこの割合以上下回ったら、指定したレートを維持できなかったとみなす
+RATE_TOLERANCE = 0.1
+
+class StageRecorder:
+    """
+    評価処理中のステージ別時間をスレッドごとに記録する
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.samples: List[Dict[str, float]] = []
+
+    def start(self):
+        self._local.timings = {stage: 0.0 for stage in STAGES}
+
+    def finish(self):
+        timings = getattr(self._local, "timings", None)
+        self._local.timings = None
+        if timings is not None:
+            with self._lock:
+                self.samples.append(timings)
+
+    def add(self, stage: str, seconds: float):
+        timings = getattr(self._local, "timings", None)
+        if timings is not None:
+            timings[stage] += seconds
+
+    def timed(self, stage: str, func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return wrapper
+
+def install_stubs(recorder: StageRecorder, sandbox_latency: float, llm_latency: float):
+    """
+    サンドボックスとLLMをスタブに置き換え、ステージ計測用のフックを登録する
+    """
+    from sqlalchemy import event
+    from app.database.database import SessionLocal
+    from app.routers import submissions
+    from app.services.code_evaluator import CodeEvaluator
+    from app.services.local_advice_service import LocalAdviceService
+
+    class StubCodeEvaluator(CodeEvaluator):
+        """
+        Dockerの代わりにローカルのPythonプロセスでテストコードを実行する
+        """
+
+        def __init__(self):
+            self.timeout = int(os.getenv("SANDBOX_TIMEOUT", 30))
+
+        def _run_in_container(self, volume_path: str, case_num: int) -> Dict[str, Any]:
+            if sandbox_latency:
+                time.sleep(sandbox_latency)
+            completed = subprocess.run(
+                [sys.executable, os.path.join(volume_path, "test_code.py")],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout
+            )
+            try:
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+            except (IndexError, json.JSONDecodeError):
+                return {
+                    "case_num": case_num,
+                    "status": "error",
+                    "error": "コード実行エラー",
+                    "stderr": completed.stderr
+                }
+            result["case_num"] = case_num
+            return result
+
+    StubCodeEvaluator.check_code_safety = recorder.timed("safety_check", CodeEvaluator.check_code_safety)
+    StubCodeEvaluator.evaluate_code = recorder.timed("sandbox", CodeEvaluator.evaluate_code)
+
+    class StubLLMProvider(LocalAdviceService):
+        """
+        ローカルプロバイダーに疑似的な応答待ち時間を加えたもの
+        """
+
+        def _generate_advice(self, *args):
+            if llm_latency:
+                time.sleep(llm_latency)
+            return super()._generate_advice(*args)
+
+        def _detect_cheating(self, *args):
+            if llm_latency:
+                time.sleep(llm_latency)
+            return super()._detect_cheating(*args)
+
+    StubLLMProvider.generate_advice = recorder.timed("llm", LocalAdviceService.generate_advice)
+    StubLLMProvider.detect_cheating = recorder.timed("llm", LocalAdviceService.detect_cheating)
+
+    evaluator = StubCodeEvaluator()
+    llm_provider = StubLLMProvider()
+    submissions.get_code_evaluator = lambda: evaluator
+    submissions.get_llm_provider = lambda: llm_provider
+
+    evaluate_submission = submissions.evaluate_submission
+
+    def timed_evaluate_submission(*args, **kwargs):
+        recorder.start()
+        try:
+            return evaluate_submission(*args, **kwargs)
+        finally:
+            recorder.finish()
+
+    submissions.evaluate_submission = timed_evaluate_submission
+
+    commit_started = threading.local()
+
+    @event.listens_for(SessionLocal, "before_commit")
+    def _before_commit(session):
+        commit_started.value = time.perf_counter()
+
+    @event.listens_for(SessionLocal, "after_commit")
+    def _after_commit(session):
+        started = getattr(commit_started, "value", None)
+        if started is not None:
+            recorder.add("db_write", time.perf_counter() - started)
+            commit_started.value = None
+
+def start_server(port: int):
+    """
+    アプリを別スレッドのuvicornで起動する
+    """
+    import uvicorn
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Failed to start server")
+        time.sleep(0.05)
+    return server, thread
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    # 最近傍順位法
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+def run_submission(session, base_url: str, problem_id: int, kind: str, code: str, expected_status: str, scheduled: float, poll_interval: float, timeout: float) -> Dict[str, Any]:
+    """
+    1件の提出を行い、評価が完了するまでポーリングする
+
+    クライアント側の待ち時間もレイテンシに含めるため、実際の送信時刻ではなく予定到着時刻 scheduled から計測する。
+    評価後の状態が expected_status と異なる場合はエラーとし、レイテンシには含めない。
+    """
+    sent = time.perf_counter()
+    result: Dict[str, Any] = {
+        "kind": kind, "status": None, "error": None, "latency": None,
+        "scheduled": scheduled, "sent": sent, "dispatch_lag": sent - scheduled
+    }
+    try:
+        response = session.post(
+            f"{base_url}/api/submissions/",
+            json={"problem_id": problem_id, "student_name": f"bench-{kind}", "code": code},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        submission_id = response.json()["id"]
+
+        while True:
+            response = session.get(f"{base_url}/api/submissions/{submission_id}", timeout=timeout)
+            response.raise_for_status()
+            status = response.json()["status"]
+            if status != "pending":
+                result["status"] = status
+                if status == expected_status:
+                    result["latency"] = time.perf_counter() - scheduled
+                else:
+                    result["error"] = f"unexpected_status:{status}"
+                return result
+            if time.perf_counter() - sent > timeout:
+                result["error"] = "Timeout"
+                return result
+            time.sleep(poll_interval)
+    except Exception as e:
+        result["error"] = type(e).__name__
+        return result
+
+def run_benchmark(args) -> Dict[str, Any]:
+    import requests
+
+    from app.database.migrate import migrate
+
+    migrate()
+    recorder = StageRecorder()
+    install_stubs(recorder, args.sandbox_latency, args.llm_latency)
+    server, thread = start_server(args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency)
+    session.mount("http://", adapter)
+
+    response = session.post(f"{base_url}/api/problems/", json=BENCH_PROBLEM)
+    response.raise_for_status()
+    problem_id = response.json()["id"]
+
+    rng = random.Random(args.seed)
+    kinds = [kind for kind, _, _, _ in SUBMISSION_MIX]
+    weights = [weight for _, weight, _, _ in SUBMISSION_MIX]
+    expected_statuses = {kind: status for kind, _, status, _ in SUBMISSION_MIX}
+    codes = {kind: code for kind, _, _, code in SUBMISSION_MIX}
+
+    futures = []
+    started = time.perf_counter()
+    next_arrival = started
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in range(args.count):
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = rng.choices(kinds, weights)[0]
+            futures.append(executor.submit(
+                run_submission, session, base_url, problem_id, kind, codes[kind],
+                expected_statuses[kind], next_arrival, args.poll_interval, args.timeout
+            ))
+            if args.arrival == "poisson":
+                next_arrival += rng.expovariate(args.rate)
+            else:
+                next_arrival += 1 / args.rate
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    server.should_exit = True
+    thread.join(timeout=10)
+
+    latencies = [r["latency"] for r in results if r["latency"] is not None]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+
+    # 予定した到着レートと実際に送信できたレート（クライアントが詰まると後者が下回る）
+    scheduled_times = sorted(r["scheduled"] for r in results)
+    sent_times = sorted(r["sent"] for r in results)
+    offered_rate = (len(results) - 1) / (scheduled_times[-1] - scheduled_times[0]) if len(results) > 1 and scheduled_times[-1] > scheduled_times[0] else args.rate
+    achieved_rate = (len(results) - 1) / (sent_times[-1] - sent_times[0]) if len(results) > 1 and sent_times[-1] > sent_times[0] else offered_rate
+
+    by_kind: Dict[str, Dict[str, Any]] = {}
+    for kind in kinds:
+        kind_results = [r for r in results if r["kind"] == kind]
+        statuses: Dict[str, int] = {}
+        for r in kind_results:
+            key = r["status"] or "failed_request"
+            statuses[key] = statuses.get(key, 0) + 1
+        by_kind[kind] = {
+            "count": len(kind_results),
+            "statuses": statuses,
+            "latency": summarize([r["latency"] for r in kind_results if r["latency"] is not None]),
+        }
+
+    return {
+        "config": {
+            "rate": args.rate,
+            "count": args.count,
+            "arrival": args.arrival,
+            "concurrency": args.concurrency,
+            "sandbox_latency": args.sandbox_latency,
+            "llm_latency": args.llm_latency,
+            "seed": args.seed,
+        },
+        "elapsed": elapsed,
+        "offered_rate": offered_rate,
+        "achieved_rate": achieved_rate,
+        "rate_shortfall": achieved_rate < offered_rate * (1 - RATE_TOLERANCE),
+        "dispatch_lag": summarize([r["dispatch_lag"] for r in results]),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "error_rate": sum(errors.values()) / len(results) if results else 0.0,
+        "errors": errors,
+        "unexpected_statuses": sum(count for error, count in errors.items() if error.startswith("unexpected_status:")),
+        "latency": summarize(latencies),
+        "stages": {stage: summarize([s[stage] for s in recorder.samples]) for stage in STAGES},
+        "by_kind": by_kind,
+    }
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float, max_error_rate_increase: float) -> List[str]:
+    """
+    ベースラインと比較し、許容範囲を超えた劣化の一覧を返す
+
+    レイテンシ・スループットは max_regression の割合、エラー率は max_error_rate_increase の差まで許容する。
+    期待と異なる状態で終わった提出は、ベースラインに関係なく1件でもあれば劣化とみなす。
+    """
+    regressions = []
+
+    # 負荷条件が異なる結果同士は比較できない
+    for key in ("rate", "count", "arrival", "concurrency", "sandbox_latency", "llm_latency"):
+        if baseline.get("config", {}).get(key) != report["config"][key]:
+            regressions.append(f"config.{key} differs from baseline: {baseline.get('config', {}).get(key)} -> {report['config'][key]}")
+    if report["rate_shortfall"]:
+        regressions.append(f"achieved_rate {report['achieved_rate']:.4f} is below offered_rate {report['offered_rate']:.4f}")
+
+    def check_higher(label: str, current: Optional[float], previous: Optional[float]):
+        if current is None or previous is None or previous <= 0:
+            return
+        if current > previous * (1 + max_regression):
+            regressions.append(f"{label}: {previous:.4f} -> {current:.4f}")
+
+    for key in ("p50", "p95", "p99"):
+        check_higher(f"latency.{key}", report["latency"][key], baseline["latency"].get(key))
+    for stage in STAGES:
+        check_higher(
+            f"stages.{stage}.p95",
+            report["stages"][stage]["p95"],
+            baseline.get("stages", {}).get(stage, {}).get("p95")
+        )
+
+    if report["throughput"] < baseline["throughput"] * (1 - max_regression):
+        regressions.append(f"throughput: {baseline['throughput']:.4f} -> {report['throughput']:.4f}")
+    if report["error_rate"] > baseline["error_rate"] + max_error_rate_increase:
+        regressions.append(f"error_rate: {baseline['error_rate']:.4f} -> {report['error_rate']:.4f}")
+    if report["unexpected_statuses"]:
+        regressions.append(f"{report['unexpected_statuses']} submissions finished with an unexpected status")
+
+    return regressions
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="提出パイプラインの負荷試験")
+    parser.add_argument("--rate", type=float, default=5.0, help="1秒あたりの提出数")
+    parser.add_argument("--count", type=int, default=100, help="提出の総数")
+    parser.add_argument("--arrival", choices=["uniform", "poisson"], default="poisson", help="到着間隔の分布")
+    parser.add_argument("--concurrency", type=int, default=32, help="クライアントの最大同時実行数")
+    parser.add_argument("--sandbox-latency", type=float, default=0.0, help="テストケースごとに加えるサンドボックスの待ち時間（秒）")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="LLM呼び出しごとに加える待ち時間（秒）")
+    parser.add_argument("--poll-interval", type=float, default=0.02, help="評価状態のポーリング間隔（秒）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="1件あたりのタイムアウト（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="提出の組み合わせの乱数シード")
+    parser.add_argument("--port", type=int, default=0, help="サーバーのポート（0なら空きポート）")
+    parser.add_argument("--output", help="結果のJSONを書き出すファイル（省略時は標準出力）")
+    parser.add_argument("--baseline", help="比較対象のベースラインJSON")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="レイテンシ・スループットで許容する劣化の割合")
+    parser.add_argument("--max-error-rate-increase", type=float, default=0.02, help="ベースラインから許容するエラー率の増加（0.02なら2ポイント）")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.port == 0:
+        args.port = free_port()
+
+    # アプリの読み込み前に、ベンチマーク専用のデータベースとプロバイダーを設定する
+    temp_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+    os.environ["LLM_PROVIDER"] = "local"
+    os.chdir(ROOT_DIR)
+    sys.path.insert(0, ROOT_DIR)
+
+    report = run_benchmark(args)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    latency = report["latency"]
+    if report["rate_shortfall"]:
+        print(
+            f"WARNING: achieved rate {report['achieved_rate']:.2f}/s is below offered rate {report['offered_rate']:.2f}/s; "
+            f"increase --concurrency or lower --rate",
+            file=sys.stderr
+        )
+    print(
+        f"offered={report['offered_rate']:.2f}/s achieved={report['achieved_rate']:.2f}/s "
+        f"throughput={report['throughput']:.2f}/s error_rate={report['error_rate']:.2%} "
+        f"p50={latency['p50']} p95={latency['p95']} p99={latency['p99']}",
+        file=sys.stderr
+    )
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.max_regression, args.max_error_rate_increase)
+        if regressions:
+            print("Regressions detected:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+アプリ起動時間の計測
+
+新しいプロセスで app.main の読み込み時間と、uvicorn の起動から最初のリクエストに
+応答するまでの時間を計測する。
+
+使い方:
+    python benchmarks/bench_startup.py --repeat 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = """
+import time
+started = time.perf_counter()
+import app.main
+print(time.perf_counter() - started)
+"""
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_import(env: Dict[str, str]) -> float:
+    """
+    新しいプロセスで app.main を読み込む時間（秒）
+    """
+    completed = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return float(completed.stdout.strip().splitlines()[-1])
+
+def slowest_imports(env: Dict[str, str], top: int) -> List[Dict[str, Any]]:
+    """
+    -X importtime の結果から累積時間の長いモジュールを返す
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({"module": name.strip(), "self": int(self_us) / 1e6, "cumulative": int(cumulative_us) / 1e6})
+    modules.sort(key=lambda m: m["cumulative"], reverse=True)
+    return modules[:top]
+
+def measure_first_request(env: Dict[str, str], path: str, timeout: float) -> Dict[str, Optional[float]]:
+    """
+    uvicorn を起動し、/health と指定したパスに最初に応答するまでの時間（秒）
+    """
+    import requests
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env
+    )
+    try:
+        ready = None
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn exited before becoming ready")
+            try:
+                if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                    ready = time.perf_counter() - started
+                    break
+            except requests.ConnectionError:
+                time.sleep(0.01)
+        if ready is None:
+            raise RuntimeError("uvicorn did not become ready in time")
+
+        request_started = time.perf_counter()
+        requests.get(f"{base_url}{path}", timeout=timeout).raise_for_status()
+        first_request = time.perf_counter() - request_started
+        return {"time_to_ready": ready, "first_request": first_request}
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "min": ordered[0],
+        "median": ordered[len(ordered) // 2],
+        "max": ordered[-1],
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="アプリ起動時間の計測")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数")
+    parser.add_argument("--path", default="/api/problems/", help="最初のリクエストで取得するパス")
+    parser.add_argument("--timeout", type=float, default=30.0, help="起動待ちのタイムアウト（秒）")
+    parser.add_argument("--top", type=int, default=10, help="表示する読み込みの遅いモジュール数")
+    parser.add_argument("--output", help="結果のJSONを書き出すファイル（省略時は標準出力）")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    temp_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+    env["LLM_PROVIDER"] = "local"
+    env["PYTHONPATH"] = ROOT_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    subprocess.run([sys.executable, "-m", "app.database.migrate"], cwd=ROOT_DIR, env=env, capture_output=True, check=True)
+
+    import_times = [measure_import(env) for _ in range(args.repeat)]
+    startups = [measure_first_request(env, args.path, args.timeout) for _ in range(args.repeat)]
+
+    report = {
+        "config": {"repeat": args.repeat, "path": args.path},
+        "import_time": summarize(import_times),
+        "time_to_ready": summarize([s["time_to_ready"] for s in startups]),
+        "first_request": summarize([s["first_request"] for s in startups]),
+        "slowest_imports": slowest_imports(env, args.top),
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    print(
+        f"import={report['import_time']['median']:.3f}s "
+        f"ready={report['time_to_ready']['median']:.3f}s "
+        f"first_request={report['first_request']['median']:.3f}s",
+        file=sys.stderr
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
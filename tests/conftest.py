@@ -0,0 +1,78 @@
+import os
+import re
+import tempfile
+
+# アプリの読み込み前に、テスト専用のデータベースとプロバイダーを設定する
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='advice_tests_'), 'test.db')}"
+os.environ["LLM_PROVIDER"] = "local"
+
+import pytest
+from fastapi.testclient import TestClient
+from app.database.database import Base, SessionLocal, engine
+from app.database.migrate import migrate
+from app.routers import problems, submissions
+from app.services.code_evaluator import CodeEvaluator
+from app.services.local_advice_service import LocalAdviceService
+
+class StubCodeEvaluator(CodeEvaluator):
+    """
+    Dockerを使わず、main(a, b) == a + b の問題として結果を返す評価サービス
+    """
+
+    def __init__(self):
+        self.timeout = 1
+
+    def _run_test_case(self, code, test_case, case_num):
+        a, b = test_case["input"]
+        actual = a + b if "a + b" in code else None
+        return {
+            "case_num": case_num,
+            "status": "passed" if actual == test_case["expected"] else "failed",
+            "expected": test_case["expected"],
+            "actual": actual
+        }
+
+PROBLEM = {
+    "title": "2つの数の和",
+    "description": "a と b の和を返す main を実装してください",
+    "test_cases": '[{"input": [1, 2], "expected": 3}]',
+    "expected_output": "a + b",
+    "difficulty": "beginner"
+}
+
+def metric_value(text, name, **labels):
+    """
+    Prometheus形式のテキストから、名前とラベルが一致する系列の値を取得する（なければ0）
+    """
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        series, value = line.rsplit(" ", 1)
+        match = re.fullmatch(r"(\w+)(?:\{(.*)\})?", series)
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+        if match.group(1) == name and found == labels:
+            return float(value)
+    return 0.0
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    migrate()
+    problems.problem_cache.clear()
+    submissions.submission_cache.clear()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def client(db, monkeypatch):
+    evaluator = StubCodeEvaluator()
+    llm_provider = LocalAdviceService()
+    monkeypatch.setattr(submissions, "get_code_evaluator", lambda: evaluator)
+    monkeypatch.setattr(submissions, "get_llm_provider", lambda: llm_provider)
+
+    from app.main import app
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,52 @@
+from app.services.cache import ResponseCache
+
+def test_get_or_load_caches_result():
+    cache = ResponseCache()
+    calls = []
+
+    def load():
+        calls.append(1)
+        return {"value": 1}, None
+
+    first = cache.get_or_load("key", load)
+    second = cache.get_or_load("key", load)
+    assert first is second
+    assert len(calls) == 1
+
+def test_load_racing_invalidation_is_not_stored():
+    cache = ResponseCache()
+
+    def load():
+        # 読み込み中に別のリクエストが更新して無効化した状況
+        cache.clear()
+        return {"value": "stale"}, None
+
+    entry = cache.get_or_load("key", load)
+    assert entry.content == b'{"value":"stale"}'
+    assert cache.get("key") is None
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("app.services.cache.time.monotonic", lambda: clock[0])
+    cache = ResponseCache(ttl=10)
+    cache.set("key", {"value": 1})
+
+    clock[0] += 5
+    assert cache.get("key") is not None
+    clock[0] += 6
+    assert cache.get("key") is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+def test_etag_depends_on_content():
+    cache = ResponseCache()
+    assert cache.set("a", {"x": 1}).etag == cache.set("b", {"x": 1}).etag
+    assert cache.set("c", {"x": 1}).etag != cache.set("d", {"x": 2}).etag
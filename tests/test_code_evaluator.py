@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+from docker.errors import ContainerError
+from app.services.code_evaluator import CodeEvaluator
+from app.services.metrics import REGISTRY
+from tests.conftest import metric_value
+
+TEST_CASES = '[{"input": [1, 2], "expected": 3}, {"input": [2, 3], "expected": 5}]'
+
+class FailingContainers:
+    def __init__(self, error):
+        self.error = error
+
+    def run(self, *args, **kwargs):
+        raise self.error
+
+class FailingSandboxEvaluator(CodeEvaluator):
+    """
+    コンテナの実行が常に失敗するDockerクライアントを持つ評価サービス
+    """
+
+    def __init__(self, error):
+        self.timeout = 1
+        self.client = SimpleNamespace(containers=FailingContainers(error))
+
+def error_count(stage: str, error_type: str) -> float:
+    return metric_value(REGISTRY.render(), "submission_evaluation_errors_total", stage=stage, error_type=error_type)
+
+def test_container_errors_are_counted_in_sandbox_stage():
+    error = ContainerError(None, 1, "python /app/test_code.py", "python:3.9-slim", "Traceback ...")
+    before = error_count("sandbox", "ContainerError")
+    results, all_passed = FailingSandboxEvaluator(error).evaluate_code("def main(a, b):\n    return a + b\n", TEST_CASES)
+    assert not all_passed
+    assert [detail["status"] for detail in results["details"]] == ["error", "error"]
+    assert results["errors"][0].startswith("コンテナエラー")
+    assert error_count("sandbox", "ContainerError") == before + 2
+
+def test_docker_failures_are_counted_by_type():
+    before = error_count("sandbox", "ConnectionError")
+    results, all_passed = FailingSandboxEvaluator(ConnectionError("docker daemon is not running")).evaluate_code(
+        "def main(a, b):\n    return a + b\n", TEST_CASES
+    )
+    assert not all_passed
+    assert results["errors"][0].startswith("実行エラー")
+    assert error_count("sandbox", "ConnectionError") == before + 2
+
+def test_invalid_test_cases_are_counted():
+    before = error_count("evaluate_code", "JSONDecodeError")
+    results, all_passed = FailingSandboxEvaluator(None).evaluate_code("def main():\n    pass\n", "not json")
+    assert not all_passed
+    assert error_count("evaluate_code", "JSONDecodeError") == before + 1
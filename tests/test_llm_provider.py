@@ -0,0 +1,160 @@
+import logging
+import pytest
+from app.services.llm_provider import (
+    CHEATING_CONFIDENCE_THRESHOLD,
+    FallbackLLMProvider,
+    LLMProvider,
+    create_llm_provider,
+)
+from app.services.local_advice_service import LocalAdviceService
+from app.services.replay_service import ReplayAdviceService
+
+TEST_RESULTS = {
+    "passed": 1,
+    "total": 2,
+    "details": [{"case_num": 1, "status": "failed", "expected": 3, "actual": None}],
+    "errors": []
+}
+
+FIZZBUZZ = """
+def main(n):
+    if n % 15 == 0:
+        return "FizzBuzz"
+    elif n % 3 == 0:
+        return "Fizz"
+    elif n % 5 == 0:
+        return "Buzz"
+    return str(n)
+"""
+
+class EchoProvider(LLMProvider):
+    name = "echo"
+
+    def __init__(self):
+        self.calls = 0
+
+    def _generate_text(self, prompt: str) -> str:
+        self.calls += 1
+        return '{"advice": "recorded", "suggestions": ["s"], "hints": []}'
+
+class FailingProvider(LLMProvider):
+    name = "failing"
+
+    def __init__(self):
+        self.calls = 0
+        self.fail = True
+
+    def _generate_text(self, prompt: str) -> str:
+        self.calls += 1
+        if self.fail:
+            raise TimeoutError("request timed out")
+        return '{"advice": "primary"}'
+
+@pytest.fixture(autouse=True)
+def no_gemini_key(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_FALLBACK", raising=False)
+
+def test_create_local_provider():
+    assert isinstance(create_llm_provider("local"), LocalAdviceService)
+
+def test_create_replay_provider(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_REPLAY_DIR", str(tmp_path))
+    provider = create_llm_provider("replay")
+    assert isinstance(provider, ReplayAdviceService)
+    assert provider.recorder is None
+
+def test_unknown_provider_raises():
+    with pytest.raises(ValueError):
+        create_llm_provider("unknown")
+
+def test_gemini_without_key_falls_back_with_warning(caplog):
+    with caplog.at_level(logging.WARNING, logger="app.services.llm_provider"):
+        provider = create_llm_provider("gemini")
+    assert isinstance(provider, LocalAdviceService)
+    assert "falling back to the local provider" in caplog.text
+
+def test_gemini_without_key_raises_when_fallback_disabled(monkeypatch):
+    monkeypatch.setenv("LLM_FALLBACK", "false")
+    with pytest.raises(ValueError):
+        create_llm_provider("gemini")
+
+def test_record_without_gemini_raises(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_REPLAY_DIR", str(tmp_path))
+    with pytest.raises(ValueError):
+        create_llm_provider("record")
+
+def test_record_failure_is_not_replaced_with_local_advice(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_REPLAY_DIR", str(tmp_path))
+    recorder = FailingProvider()
+    monkeypatch.setattr("app.services.gemini_service.GeminiAdviceService", lambda timeout: recorder)
+    provider = create_llm_provider("record")
+    assert not isinstance(provider, FallbackLLMProvider)
+
+    for _ in range(5):
+        result = provider.generate_advice("code", "desc", TEST_RESULTS)
+        assert result["advice"].startswith("アドバイス生成エラー")
+    # 失敗が続いても記録を迂回せず、毎回Geminiを呼び出す
+    assert recorder.calls == 5
+    assert list(tmp_path.iterdir()) == []
+
+def test_record_then_replay(tmp_path):
+    recorder = EchoProvider()
+    recorded = ReplayAdviceService(str(tmp_path), recorder=recorder).generate_advice("code", "desc", TEST_RESULTS)
+    assert recorded["advice"] == "recorded"
+    assert recorder.calls == 1
+
+    replayed = ReplayAdviceService(str(tmp_path)).generate_advice("code", "desc", TEST_RESULTS)
+    assert replayed == recorded
+
+def test_replay_miss_returns_error_advice(tmp_path):
+    result = ReplayAdviceService(str(tmp_path)).generate_advice("code", "desc", TEST_RESULTS)
+    assert result["advice"].startswith("アドバイス生成エラー")
+
+def test_fallback_on_primary_error():
+    primary = FailingProvider()
+    provider = FallbackLLMProvider(primary, LocalAdviceService(), failure_threshold=3, cooldown=60)
+    result = provider.generate_advice("def main(a, b):\n    pass\n", "desc", TEST_RESULTS)
+    assert result == LocalAdviceService().generate_advice("def main(a, b):\n    pass\n", "desc", TEST_RESULTS)
+    assert primary.calls == 1
+
+def test_circuit_opens_after_consecutive_failures():
+    primary = FailingProvider()
+    provider = FallbackLLMProvider(primary, LocalAdviceService(), failure_threshold=2, cooldown=60)
+    for _ in range(5):
+        provider.generate_advice("code", "desc", TEST_RESULTS)
+    assert primary.calls == 2
+
+def test_circuit_probes_after_cooldown_and_recovers(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.llm_provider.time.monotonic", lambda: clock[0])
+    primary = FailingProvider()
+    provider = FallbackLLMProvider(primary, LocalAdviceService(), failure_threshold=1, cooldown=10)
+
+    provider.generate_advice("code", "desc", TEST_RESULTS)
+    provider.generate_advice("code", "desc", TEST_RESULTS)
+    assert primary.calls == 1
+
+    clock[0] += 11
+    primary.fail = False
+    assert provider.generate_advice("code", "desc", TEST_RESULTS)["advice"] == "primary"
+    assert provider.generate_advice("code", "desc", TEST_RESULTS)["advice"] == "primary"
+    assert primary.calls == 3
+
+@pytest.mark.parametrize("code", [
+    FIZZBUZZ,
+    "def is_valid(x):\n    return True\n\ndef main(a):\n    return a\n",
+    "def main(a):\n    return None\n",
+    "def helper(a):\n    return 3\n\ndef main(a, b):\n    return a + b\n",
+])
+def test_local_cheat_detection_ignores_ordinary_code(code):
+    assert LocalAdviceService().detect_cheating(code, "desc")["is_cheating"] is False
+
+@pytest.mark.parametrize("code", [
+    "def main(a, b):\n    return 3\n",
+    "def main(n):\n    if n == 1:\n        return 1\n    if n == 2:\n        return 4\n    if n == 3:\n        return 9\n    return 0\n",
+])
+def test_local_cheat_detection_never_overrides_advice(code):
+    result = LocalAdviceService().detect_cheating(code, "desc")
+    assert result["is_cheating"] is True
+    assert result["confidence"] <= CHEATING_CONFIDENCE_THRESHOLD
@@ -0,0 +1,115 @@
+import json
+import pytest
+from app.models import models
+from app.services.metrics import REGISTRY, MetricsRegistry, span, start_trace
+from tests.conftest import PROBLEM, StubCodeEvaluator, metric_value
+
+CORRECT_CODE = "def main(a, b):\n    return a + b\n"
+UNSAFE_CODE = "import os\n\ndef main(a, b):\n    return a + b\n"
+
+def test_exposition_format():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Number of jobs", ("kind",))
+    histogram = registry.histogram("job_seconds", "Job duration", ("kind",), buckets=(0.1, 1.0))
+    counter.inc(kind='say "hi"\n')
+    counter.inc(2, kind="batch")
+    histogram.observe(0.5, kind="batch")
+    histogram.observe(2.0, kind="batch")
+
+    assert registry.render().splitlines() == [
+        "# HELP jobs_total Number of jobs",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="batch"} 2',
+        'jobs_total{kind="say \\"hi\\"\\n"} 1',
+        "# HELP job_seconds Job duration",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{kind="batch",le="0.1"} 0',
+        'job_seconds_bucket{kind="batch",le="1.0"} 1',
+        'job_seconds_bucket{kind="batch",le="+Inf"} 2',
+        'job_seconds_sum{kind="batch"} 2.5',
+        'job_seconds_count{kind="batch"} 2',
+    ]
+
+def test_span_records_stage_in_current_trace():
+    with start_trace() as trace:
+        with span("test_case", case_num=1):
+            pass
+    assert [s["stage"] for s in trace.spans] == ["test_case"]
+    assert trace.spans[0]["case_num"] == 1
+    assert trace.spans[0]["duration"] >= 0
+    assert "error" not in trace.spans[0]
+    assert trace.to_dict()["stages"] == trace.spans
+
+    # トレースの外では記録されない
+    with span("test_case"):
+        pass
+    assert len(trace.spans) == 1
+
+def test_span_records_error_type_and_reraises():
+    before = metric_value(REGISTRY.render(), "submission_evaluation_errors_total", stage="advice", error_type="TimeoutError")
+    with start_trace() as trace:
+        with pytest.raises(TimeoutError):
+            with span("advice"):
+                raise TimeoutError("request timed out")
+    assert trace.spans[0]["error"] == "TimeoutError"
+    after = metric_value(REGISTRY.render(), "submission_evaluation_errors_total", stage="advice", error_type="TimeoutError")
+    assert after == before + 1
+
+def submit(client, code):
+    problem = client.post("/api/problems/", json=PROBLEM).json()
+    response = client.post("/api/submissions/", json={"problem_id": problem["id"], "student_name": "student", "code": code})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def stored_timings(db, submission_id):
+    submission = db.query(models.Submission).filter(models.Submission.id == submission_id).first()
+    return submission.status, json.loads(submission.stage_timings)
+
+def outcome_count(client, outcome):
+    return metric_value(client.get("/metrics").text, "submission_evaluations_total", outcome=outcome)
+
+def test_metrics_endpoint(client):
+    submit(client, CORRECT_CODE)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE submission_evaluations_total counter" in response.text
+    assert "# TYPE submission_stage_duration_seconds histogram" in response.text
+    for stage in ("load", "setup", "safety_check", "test_case", "cheat_detection", "advice", "commit"):
+        assert metric_value(response.text, "submission_stage_duration_seconds_bucket", stage=stage, le="+Inf") > 0
+    assert metric_value(response.text, "submission_evaluation_duration_seconds_count") > 0
+
+def test_evaluated_submission_stores_stage_timings(client, db):
+    before = outcome_count(client, "evaluated")
+    status, timings = stored_timings(db, submit(client, CORRECT_CODE))
+    assert status == "evaluated"
+    # コミットの時間は保存後に計測されるため含まれない
+    assert [s["stage"] for s in timings["stages"]] == ["load", "setup", "safety_check", "test_case", "cheat_detection", "advice"]
+    assert timings["total"] >= sum(s["duration"] for s in timings["stages"])
+    assert outcome_count(client, "evaluated") == before + 1
+
+def test_unsafe_submission_outcome(client, db):
+    before = outcome_count(client, "unsafe")
+    status, timings = stored_timings(db, submit(client, UNSAFE_CODE))
+    assert status == "error"
+    assert [s["stage"] for s in timings["stages"]] == ["load", "setup", "safety_check"]
+    assert outcome_count(client, "unsafe") == before + 1
+
+def test_failed_evaluation_outcome(client, db, monkeypatch):
+    def broken_safety_check(self, code):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(StubCodeEvaluator, "check_code_safety", broken_safety_check)
+    before = outcome_count(client, "error")
+    errors_before = metric_value(
+        client.get("/metrics").text, "submission_evaluation_errors_total", stage="safety_check", error_type="RuntimeError"
+    )
+
+    status, timings = stored_timings(db, submit(client, CORRECT_CODE))
+    assert status == "error"
+    assert timings["stages"][-1]["stage"] == "safety_check"
+    assert timings["stages"][-1]["error"] == "RuntimeError"
+    assert outcome_count(client, "error") == before + 1
+    assert metric_value(
+        client.get("/metrics").text, "submission_evaluation_errors_total", stage="safety_check", error_type="RuntimeError"
+    ) == errors_before + 1
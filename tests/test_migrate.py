@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from app.database.migrate import migrate
+
+def create_old_schema(tmp_path, submission_columns):
+    bind = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with bind.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE problems (id INTEGER PRIMARY KEY, title VARCHAR, description TEXT, test_cases TEXT, "
+            "expected_output TEXT, difficulty VARCHAR, created_at DATETIME, updated_at DATETIME)"
+        ))
+        connection.execute(text(f"CREATE TABLE submissions ({submission_columns})"))
+    return bind
+
+def submission_columns(bind):
+    return {column["name"] for column in inspect(bind).get_columns("submissions")}
+
+def test_adds_missing_nullable_column(tmp_path):
+    bind = create_old_schema(
+        tmp_path,
+        "id INTEGER PRIMARY KEY, problem_id INTEGER, student_name VARCHAR, code TEXT, status VARCHAR, "
+        "test_results TEXT, advice TEXT, cost INTEGER, created_at DATETIME"
+    )
+    assert migrate(bind) == ["submissions.stage_timings"]
+    assert "stage_timings" in submission_columns(bind)
+    assert migrate(bind) == []
+
+def test_refuses_column_with_default(tmp_path):
+    bind = create_old_schema(
+        tmp_path,
+        "id INTEGER PRIMARY KEY, problem_id INTEGER, student_name VARCHAR, code TEXT, status VARCHAR, "
+        "test_results TEXT, advice TEXT, created_at DATETIME"
+    )
+    with pytest.raises(RuntimeError, match=r"submissions\.cost \(default value\)"):
+        migrate(bind)
+    # 追加できる列があっても、何も変更しない
+    assert "stage_timings" not in submission_columns(bind)
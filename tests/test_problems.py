@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from app.models import models
+from tests.conftest import PROBLEM
+
+def create_problem(client, **overrides):
+    response = client.post("/api/problems/", json={**PROBLEM, **overrides})
+    assert response.status_code == 200
+    return response.json()
+
+def test_get_problem_sets_validators(client):
+    problem = create_problem(client)
+    response = client.get(f"/api/problems/{problem['id']}")
+    assert response.status_code == 200
+    assert response.json()["title"] == PROBLEM["title"]
+    assert response.headers["etag"]
+    assert response.headers["last-modified"]
+    assert response.headers["cache-control"] == "no-cache"
+
+def test_if_none_match_returns_304(client):
+    problem = create_problem(client)
+    etag = client.get(f"/api/problems/{problem['id']}").headers["etag"]
+
+    response = client.get(f"/api/problems/{problem['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client.get(f"/api/problems/{problem['id']}", headers={"If-None-Match": 'W/' + etag})
+    assert response.status_code == 304
+
+    response = client.get(f"/api/problems/{problem['id']}", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+def test_if_modified_since(client):
+    problem = create_problem(client)
+    last_modified = client.get(f"/api/problems/{problem['id']}").headers["last-modified"]
+
+    response = client.get(f"/api/problems/{problem['id']}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(days=1), usegmt=True)
+    response = client.get(f"/api/problems/{problem['id']}", headers={"If-Modified-Since": earlier})
+    assert response.status_code == 200
+
+    response = client.get(f"/api/problems/{problem['id']}", headers={"If-Modified-Since": "not a date"})
+    assert response.status_code == 200
+
+def test_if_none_match_takes_precedence_over_if_modified_since(client):
+    problem = create_problem(client)
+    last_modified = client.get(f"/api/problems/{problem['id']}").headers["last-modified"]
+    response = client.get(
+        f"/api/problems/{problem['id']}",
+        headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 200
+
+def test_problem_list_uses_etag_only(client):
+    create_problem(client)
+    response = client.get("/api/problems/")
+    assert response.status_code == 200
+    assert "last-modified" not in response.headers
+    assert client.get("/api/problems/", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+def test_responses_are_served_from_cache(client, db):
+    problem = create_problem(client)
+    client.get(f"/api/problems/{problem['id']}")
+
+    # APIを通さずに変更した場合はキャッシュが返される
+    db.query(models.Problem).filter(models.Problem.id == problem["id"]).update({"title": "changed"})
+    db.commit()
+    assert client.get(f"/api/problems/{problem['id']}").json()["title"] == PROBLEM["title"]
+
+def test_create_invalidates_list(client):
+    create_problem(client)
+    etag = client.get("/api/problems/").headers["etag"]
+
+    create_problem(client, title="second")
+    response = client.get("/api/problems/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [p["title"] for p in response.json()] == [PROBLEM["title"], "second"]
+
+def test_update_invalidates_problem_and_list(client):
+    problem = create_problem(client)
+    detail_etag = client.get(f"/api/problems/{problem['id']}").headers["etag"]
+    list_etag = client.get("/api/problems/").headers["etag"]
+
+    response = client.put(f"/api/problems/{problem['id']}", json={**PROBLEM, "title": "updated"})
+    assert response.status_code == 200
+
+    response = client.get(f"/api/problems/{problem['id']}", headers={"If-None-Match": detail_etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "updated"
+    response = client.get("/api/problems/", headers={"If-None-Match": list_etag})
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "updated"
+
+def test_delete_invalidates_problem_and_list(client):
+    problem = create_problem(client)
+    client.get(f"/api/problems/{problem['id']}")
+    client.get("/api/problems/")
+
+    assert client.delete(f"/api/problems/{problem['id']}").status_code == 200
+    assert client.get(f"/api/problems/{problem['id']}").status_code == 404
+    assert client.get("/api/problems/").json() == []
+
+def test_missing_problem_is_not_cached(client):
+    assert client.get("/api/problems/1").status_code == 404
+    create_problem(client)
+    assert client.get("/api/problems/1").status_code == 200
@@ -0,0 +1,61 @@
+from app.models import models
+from tests.conftest import PROBLEM
+
+def create_problem(client):
+    return client.post("/api/problems/", json=PROBLEM).json()
+
+def create_pending_submission(db, problem_id):
+    submission = models.Submission(problem_id=problem_id, student_name="student", code="def main(a, b):\n    return a + b\n")
+    db.add(submission)
+    db.commit()
+    db.refresh(submission)
+    return submission
+
+def test_pending_submission_is_not_cached(client, db):
+    problem = create_problem(client)
+    submission = create_pending_submission(db, problem["id"])
+
+    response = client.get(f"/api/submissions/{submission.id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending"
+    assert "etag" not in response.headers
+
+    submission.status = "evaluated"
+    db.commit()
+    response = client.get(f"/api/submissions/{submission.id}")
+    assert response.json()["status"] == "evaluated"
+    assert response.headers["etag"]
+
+def test_evaluated_submission_returns_304(client):
+    problem = create_problem(client)
+    submission = client.post("/api/submissions/", json={
+        "problem_id": problem["id"],
+        "student_name": "student",
+        "code": "def main(a, b):\n    return a + b\n"
+    }).json()
+
+    response = client.get(f"/api/submissions/{submission['id']}")
+    assert response.json()["status"] == "evaluated"
+    assert "last-modified" not in response.headers
+
+    response = client.get(f"/api/submissions/{submission['id']}", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+def test_advice_is_cached_once_evaluated(client, db):
+    problem = create_problem(client)
+    submission = create_pending_submission(db, problem["id"])
+
+    assert client.get(f"/api/submissions/{submission.id}/advice").status_code == 400
+
+    submission.status = "evaluated"
+    submission.test_results = '{"passed": 1, "total": 1}'
+    submission.advice = '{"advice": "good", "suggestions": ["s"]}'
+    db.commit()
+
+    response = client.get(f"/api/submissions/{submission.id}/advice")
+    assert response.status_code == 200
+    assert response.json()["advice"] == "good"
+    assert "last-modified" not in response.headers
+
+    response = client.get(f"/api/submissions/{submission.id}/advice", headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304